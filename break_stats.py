@@ -0,0 +1,215 @@
+"""Statistiques de casse : simule des milliers de casses en parallèle, sans interface Qt.
+
+Exemple :
+    python break_stats.py --shots 100000 --output casses.csv --damping 0.97
+    python break_stats.py --shots 1000000 --format npy --output casses_npy/
+"""
+import argparse
+import csv
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import pymunk
+
+from model.billard_physics import (
+    BALL_RADIUS, MAX_POWER, STOP_THRESHOLD, FRAME_DT, SUBSTEPS,
+    create_space, create_table, create_balls
+)
+
+TABLE_WIDTH = 1200
+TABLE_HEIGHT = 600
+# Une balle compte comme déplacée si elle a bougé d'au moins son rayon
+DISPLACEMENT_THRESHOLD = BALL_RADIUS
+
+COLUMNS = ["shot", "seed", "cue_x", "cue_y", "angle", "power",
+           "balls_displaced", "balls_pocketed", "cue_scratched",
+           "cue_final_x", "cue_final_y", "came_to_rest", "time_to_rest", "contacts"]
+INT_COLUMNS = ("shot", "seed", "balls_displaced", "balls_pocketed", "cue_scratched", "came_to_rest", "contacts")
+
+
+def _count_contacts(space, counter):
+    def begin(arbiter, space, data):
+        counter[0] += 1
+        return True
+
+    if hasattr(space, "on_collision"):  # pymunk >= 7
+        space.on_collision(begin=begin)
+    else:
+        space.add_default_collision_handler().begin = begin
+
+
+def simulate_shot(shot, seed, config):
+    rng = random.Random(seed)
+    space = create_space(config["damping"])
+    create_table(space, TABLE_WIDTH, TABLE_HEIGHT,
+                 elasticity=config["cushion_elasticity"], friction=config["cushion_friction"])
+
+    # Position de la blanche dans la zone de casse, angle visé vers la tête du triangle
+    cue_x = rng.uniform(TABLE_WIDTH * 0.15, TABLE_WIDTH * 0.35)
+    cue_y = rng.uniform(TABLE_HEIGHT * 0.3, TABLE_HEIGHT * 0.7)
+    cue_ball = create_balls(space, TABLE_WIDTH, TABLE_HEIGHT, BALL_RADIUS, rng, (cue_x, cue_y),
+                            elasticity=config["ball_elasticity"], friction=config["ball_friction"])
+    angle = math.atan2(TABLE_HEIGHT / 2 - cue_y, TABLE_WIDTH * 0.75 - cue_x)
+    angle += rng.uniform(-config["angle_spread"], config["angle_spread"])
+    power = rng.uniform(config["power_min"], config["power_max"])
+
+    balls = [s for s in space.shapes if isinstance(s, pymunk.Circle) and s is not cue_ball]
+    start_positions = [pymunk.Vec2d(*s.body.position) for s in balls]
+
+    contacts = [0]
+    _count_contacts(space, contacts)
+
+    force = power * MAX_POWER
+    cue_ball.body.apply_impulse_at_world_point(
+        (force * math.cos(angle), force * math.sin(angle)), cue_ball.body.position
+    )
+
+    on_table = [cue_ball] + balls
+    pocketed = set()
+    elapsed = 0.0
+    came_to_rest = False
+    while elapsed < config["max_time"]:
+        for _ in range(SUBSTEPS):
+            space.step(FRAME_DT / SUBSTEPS)
+        elapsed += FRAME_DT
+
+        # Une balle dont le centre sort de la table est tombée dans une poche
+        for shape in on_table:
+            x, y = shape.body.position
+            if not (0 <= x <= TABLE_WIDTH and 0 <= y <= TABLE_HEIGHT):
+                pocketed.add(shape)
+                space.remove(*shape.body.constraints, shape.body, shape)
+        on_table = [s for s in on_table if s not in pocketed]
+
+        if all(s.body.velocity.length <= STOP_THRESHOLD for s in on_table):
+            came_to_rest = True
+            break
+
+    displaced = sum(1 for s, start in zip(balls, start_positions)
+                    if s in pocketed or s.body.position.get_distance(start) >= DISPLACEMENT_THRESHOLD)
+    balls_pocketed = sum(1 for s in balls if s in pocketed)
+    cue_scratched = cue_ball in pocketed
+    if cue_scratched:
+        final_x = final_y = math.nan
+    else:
+        final_x, final_y = cue_ball.body.position
+    time_to_rest = elapsed if came_to_rest else math.nan
+    return (shot, seed, cue_x, cue_y, angle, power,
+            displaced, balls_pocketed, int(cue_scratched),
+            final_x, final_y, int(came_to_rest), time_to_rest, contacts[0])
+
+
+def simulate_chunk(chunk_index, start, count, config):
+    rows = [simulate_shot(shot, config["seed"] + shot, config) for shot in range(start, start + count)]
+    return chunk_index, rows
+
+
+class CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(COLUMNS)
+
+    def write_chunk(self, chunk_index, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class NpyWriter:
+    """Écrit un fichier .npy (tableau structuré) par chunk dans un dossier."""
+
+    def __init__(self, directory):
+        import numpy as np
+        self.np = np
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.dtype = np.dtype([(name, "i8") if name in INT_COLUMNS else (name, "f8") for name in COLUMNS])
+
+    def write_chunk(self, chunk_index, rows):
+        array = self.np.array(rows, dtype=self.dtype)
+        self.np.save(os.path.join(self.directory, f"chunk_{chunk_index:06d}.npy"), array)
+
+    def close(self):
+        pass
+
+
+def run(args):
+    config = {
+        "seed": args.seed,
+        "damping": args.damping,
+        "ball_elasticity": args.ball_elasticity,
+        "ball_friction": args.ball_friction,
+        "cushion_elasticity": args.cushion_elasticity,
+        "cushion_friction": args.cushion_friction,
+        "angle_spread": args.angle_spread,
+        "power_min": args.power_min,
+        "power_max": args.power_max,
+        "max_time": args.max_time,
+    }
+    writer = NpyWriter(args.output) if args.format == "npy" else CsvWriter(args.output)
+    workers = args.workers or os.cpu_count() or 1
+    # Nombre de chunks en cours limité : la mémoire reste bornée peu importe le nombre de tirs
+    max_pending = workers * 2
+
+    chunks = ((i, start, min(args.chunk_size, args.shots - start))
+              for i, start in enumerate(range(0, args.shots, args.chunk_size)))
+    done_shots = 0
+    begin = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for chunk_index, start, count in chunks:
+                pending.add(pool.submit(simulate_chunk, chunk_index, start, count, config))
+                if len(pending) >= max_pending:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    done_shots += _write_finished(writer, finished)
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                done_shots += _write_finished(writer, finished)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - begin
+    print(f"{done_shots} tirs simulés en {elapsed:.1f} s ({done_shots / max(elapsed, 1e-9):.0f} tirs/s) -> {args.output}")
+
+
+def _write_finished(writer, finished):
+    written = 0
+    for future in finished:
+        chunk_index, rows = future.result()
+        writer.write_chunk(chunk_index, rows)
+        written += len(rows)
+    return written
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Statistiques de casse en lot (sans interface)")
+    parser.add_argument("--shots", type=int, default=10000, help="nombre de casses à simuler")
+    parser.add_argument("--output", default="break_stats.csv", help="fichier .csv ou dossier pour --format npy")
+    parser.add_argument("--format", choices=("csv", "npy"), default="csv")
+    parser.add_argument("--workers", type=int, default=0, help="nombre de processus (0 = tous les coeurs)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="tirs par chunk écrit")
+    parser.add_argument("--seed", type=int, default=0, help="graine de base, le tir i utilise seed + i")
+    parser.add_argument("--damping", type=float, default=0.98)
+    parser.add_argument("--ball-elasticity", type=float, default=0.8)
+    parser.add_argument("--ball-friction", type=float, default=1.0)
+    parser.add_argument("--cushion-elasticity", type=float, default=0.8)
+    parser.add_argument("--cushion-friction", type=float, default=0.5)
+    parser.add_argument("--angle-spread", type=float, default=0.05, help="écart max d'angle en radians")
+    parser.add_argument("--power-min", type=float, default=0.5, help="puissance min (0 à 1)")
+    parser.add_argument("--power-max", type=float, default=1.0, help="puissance max (0 à 1)")
+    parser.add_argument("--max-time", type=float, default=30.0, help="temps simulé max par tir (s)")
+    args = parser.parse_args(argv)
+    if args.shots <= 0 or args.chunk_size <= 0:
+        parser.error("--shots et --chunk-size doivent être positifs")
+    return args
+
+
+if __name__ == '__main__':
+    run(parse_args())
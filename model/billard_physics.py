@@ -0,0 +1,149 @@
+import random
+
+import pymunk
+
+# Construction de la table et des balles sans dépendance à Qt :
+# utilisé par PymunkWidget et par le script de statistiques (break_stats.py)
+
+BALL_COLORS = {
+    1: (255, 215, 0),
+    2: (0, 0, 255),
+    3: (255, 0, 0),
+    4: (128, 0, 128),
+    5: (255, 165, 0),
+    6: (34, 139, 34),
+    7: (128, 0, 0),
+    8: (0, 0, 0),
+}
+
+BALL_RADIUS = 15
+BALL_MASS = 3
+MAX_POWER = 8000
+# Vitesse sous laquelle une balle est considérée arrêtée
+STOP_THRESHOLD = 5.0
+# Pas de temps d'une frame et nombre de sous-pas pymunk par frame
+FRAME_DT = 1 / 60.0
+SUBSTEPS = 2
+
+
+def create_space(damping: float = 0.98) -> pymunk.Space:
+    space = pymunk.Space()
+    space.gravity = (0, 0)
+    space.damping = damping
+    space.sleep_time_threshold = 0.3
+    space.idle_speed_threshold = 10
+    return space
+
+
+def create_table(space, width, height, elasticity=0.8, friction=0.5):
+    thickness = 40
+    hole = 120
+    half_width = int(width / 2 - hole * 0.75)
+
+    spacer = thickness / 2
+    tri_margin = hole - spacer
+    mid_tri = half_width + spacer
+
+    # Murs
+    add_wall(space, (20, hole), (20, height - hole), thickness, elasticity, friction)
+    add_wall(space, (width - 20, hole), (width - 20, height - hole), thickness, elasticity, friction)
+    add_wall(space, (hole, 20), (half_width, 20), thickness, elasticity, friction)
+    add_wall(space, (hole, height - 20), (half_width, height - 20), thickness, elasticity, friction)
+    add_wall(space, (width - hole, height - 20), (width - half_width, height - 20), thickness, elasticity, friction)
+    add_wall(space, (width - hole, 20), (width - half_width, 20), thickness, elasticity, friction)
+
+    liste_triangle_rectangle = [
+        [(spacer, tri_margin), 1, -1],
+        [(spacer, height - tri_margin), 1, 1],
+        [(width - spacer, tri_margin), -1, -1],
+        [(width - spacer, height - tri_margin), -1, 1],
+        [(tri_margin, spacer), -1, 1],
+        [(tri_margin, height - spacer), -1, -1],
+        [(width - tri_margin, spacer), 1, 1],
+        [(width - tri_margin, height - spacer), 1, -1],
+        [(mid_tri, height - spacer), 1, -1],
+        [(width - mid_tri, height - spacer), -1, -1],
+        [(mid_tri, spacer), 1, 1],
+        [(width - mid_tri, spacer), -1, 1],
+    ]
+    add_triangles(space, liste_triangle_rectangle, thickness, elasticity, friction)
+
+
+def add_triangles(space, list_coords, thickness, elasticity=0.8, friction=0.5):
+    for coor in list_coords:
+        tri = [(coor[0][0], coor[0][1]),
+               (coor[0][0] + thickness * coor[1], coor[0][1]),
+               (coor[0][0], coor[0][1] + thickness * coor[2])]
+        triangle = pymunk.Poly(space.static_body, tri)
+        triangle.elasticity = elasticity
+        triangle.friction = friction
+        space.add(triangle)
+
+
+def add_wall(space, a, b, radius, elasticity=0.8, friction=0.5):
+    wall = pymunk.Segment(space.static_body, a, b, radius)
+    wall.elasticity = elasticity
+    wall.friction = friction
+    space.add(wall)
+
+
+def create_balls(space, width, height, ball_radius=BALL_RADIUS, rng=random,
+                 cue_position=None, elasticity=0.8, friction=1.0):
+    """Place la blanche et le triangle de 15 balles, retourne la shape de la blanche."""
+    if cue_position is None:
+        cue_position = (width // 4, height // 2)
+    cue_ball = create_single_ball(space, cue_position, 0, ball_radius, elasticity, friction)
+
+    start_x = width * 0.75
+    start_y = height / 2
+    rows = 5
+    offset_x = ball_radius * 1.75
+    offset_y = ball_radius * 2.05
+
+    available_numbers = [1, 2, 3, 4, 5, 6, 7, 9, 10, 11, 12, 13, 14, 15]
+    rng.shuffle(available_numbers)
+
+    for col in range(rows):
+        x = start_x + (col * offset_x)
+        start_col_y = start_y - (col * offset_y) / 2
+        for row in range(col + 1):
+            y = start_col_y + (row * offset_y)
+            if col == 2 and row == 1:
+                ball_number = 8
+            else:
+                ball_number = available_numbers.pop()
+            create_single_ball(space, (x, y), ball_number, ball_radius, elasticity, friction)
+
+    return cue_ball
+
+
+def create_single_ball(space, position, number, ball_radius=BALL_RADIUS, elasticity=0.8, friction=1.0):
+    moment = pymunk.moment_for_circle(BALL_MASS, 0, ball_radius)
+    body = pymunk.Body(BALL_MASS, moment)
+    body.position = position
+    shape = pymunk.Circle(body, ball_radius)
+    shape.elasticity = elasticity
+    shape.friction = friction
+
+    if number == 0:
+        color_rgb = (255, 255, 255)
+        is_stripe = False
+    elif number == 8:
+        color_rgb = BALL_COLORS[8]
+        is_stripe = False
+    else:
+        is_stripe = number > 8
+        base_index = number if number <= 8 else number - 8
+        color_rgb = BALL_COLORS[base_index]
+
+    shape.color = color_rgb + (255,)
+    shape.number = number
+    shape.is_stripe = is_stripe
+
+    # Le pivot sert de frottement contre le tapis
+    pivot = pymunk.PivotJoint(space.static_body, body, (0, 0), (0, 0))
+    pivot.max_bias = 0
+    pivot.max_force = 100
+
+    space.add(body, shape, pivot)
+    return shape
@@ -1,5 +1,7 @@
 import math
-import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, List, Tuple, Optional
 
 from PyQt6.QtWidgets import (
@@ -12,26 +14,36 @@ from PyQt6.uic import loadUi
 import pymunk
 
 from model.ball_state import BallState
+from model.billard_physics import (
+    BALL_RADIUS, MAX_POWER, STOP_THRESHOLD, FRAME_DT, SUBSTEPS,
+    create_space, create_table, create_balls
+)
 
 if TYPE_CHECKING:
     from controller.main_controller import MainController
 
-BALL_COLORS = {
-    1: (255, 215, 0),
-    2: (0, 0, 255),
-    3: (255, 0, 0),
-    4: (128, 0, 128),
-    5: (255, 165, 0),
-    6: (34, 139, 34),
-    7: (128, 0, 0),
-    8: (0, 0, 0),
-}
+# Les balles d'un même groupe ne se détectent pas entre elles : sert à exclure la blanche des requêtes
+CUE_BALL_GROUP = 1
+
+
+@dataclass
+class AimPrediction:
+    # Trajectoire prévue du centre de la blanche (coordonnées pymunk)
+    path: List[Tuple[float, float]] = field(default_factory=list)
+    # Position de la blanche au contact (ghost ball) et balle visée
+    ghost: Optional[Tuple[float, float]] = None
+    target: Optional[Tuple[float, float]] = None
+    # Direction (unitaire) que prendra la balle visée
+    deflection: Optional[Tuple[float, float]] = None
+
 
 class PymunkWidget(QWidget):
     mouse_moved = pyqtSignal(int, int)
     mouse_pressed = pyqtSignal()
     mouse_released = pyqtSignal()
     lock_toggled = pyqtSignal()
+    # Émis une fois par frame avec le temps écoulé (en secondes)
+    frame_advanced = pyqtSignal(float)
 
     def __init__(self, width: int, height: int, parent=None):
         super().__init__(parent)
@@ -44,17 +56,22 @@ class PymunkWidget(QWidget):
         self.setMouseTracking(True)
         self.mouse_pressed_flag = False
 
+        # --- Entrées coalescées ---
+        # Seule la dernière position de souris reçue entre deux frames est traitée
+        self.pending_pointer: Optional[Tuple[float, float]] = None
+        # Moment (perf_counter) de la plus vieille entrée pas encore traitée / appliquée à la frame
+        self.pending_input_time: Optional[float] = None
+        self.applied_input_time: Optional[float] = None
+        self.input_latencies = deque(maxlen=240)
+        self.last_frame_time = time.perf_counter()
+
         # --- Initialisation Pymunk ---
-        self.space = pymunk.Space()
-        self.space.gravity = (0, 0)
-        self.space.damping = 0.98
-        self.space.sleep_time_threshold = 0.3
-        self.space.idle_speed_threshold = 10
+        self.space = create_space()
 
-        self.ball_radius = 15
+        self.ball_radius = BALL_RADIUS
         self.cue_length = 200
         self.cue_width = 8
-        self.max_power = 8000
+        self.max_power = MAX_POWER
 
         self.cue_ball = None
         self.cue_stick = None
@@ -66,6 +83,14 @@ class PymunkWidget(QWidget):
 
         self.history: List[List[BallState]] = []
 
+        # --- Prédiction de la visée ---
+        self.aim_bounce_depth = 2
+        self.aim_angle_step = 0.002  # radians
+        # Incrémenté à chaque fois que les balles bougent (tir, reset, undo)
+        self.table_version = 0
+        self._aim_cache_key = None
+        self._aim_cache: Optional[AimPrediction] = None
+
         self._create_table()
         self._create_balls()
         self._create_cue_stick()
@@ -82,109 +107,11 @@ class PymunkWidget(QWidget):
         return x, self.height() - y
 
     def _create_table(self):
-        static_body = self.space.static_body
-        thickness = 40
-        hole = 120
-        half_width = int(self.width() / 2 - hole * 0.75)
-
-        spacer = thickness / 2
-        tri_margin = hole - spacer
-        mid_tri = half_width + spacer
-
-        # Murs
-        self._add_wall((20, hole), (20, self.height() - hole), thickness)
-        self._add_wall((self.width() - 20, hole), (self.width() - 20, self.height() - hole), thickness)
-        self._add_wall((hole, 20), (half_width, 20), thickness)
-        self._add_wall((hole, self.height() - 20), (half_width, self.height() - 20), thickness)
-        self._add_wall((self.width() - hole, self.height() - 20),
-                       (self.width() - half_width, self.height() - 20), thickness)
-        self._add_wall((self.width() - hole, 20), (self.width() - half_width, 20), thickness)
-
-        liste_triangle_rectangle = [
-            [(spacer, tri_margin), 1, -1],
-            [(spacer, self.height() - tri_margin), 1, 1],
-            [(self.width() - spacer, tri_margin), -1, -1],
-            [(self.width() - spacer, self.height() - tri_margin), -1, 1],
-            [(tri_margin, spacer), -1, 1],
-            [(tri_margin, self.height() - spacer), -1, -1],
-            [(self.width() - tri_margin, spacer), 1, 1],
-            [(self.width() - tri_margin, self.height() - spacer), 1, -1],
-            [(mid_tri, self.height() - spacer), 1, -1],
-            [(self.width() - mid_tri, self.height() - spacer), -1, -1],
-            [(mid_tri, spacer), 1, 1],
-            [(self.width() - mid_tri, spacer), -1, 1],
-        ]
-        self._add_triangle(liste_triangle_rectangle, thickness)
-
-    def _add_triangle(self, list_coords, thickness):
-        for coor in list_coords:
-            tri = [(coor[0][0], coor[0][1]),
-                   (coor[0][0] + thickness * coor[1], coor[0][1]),
-                   (coor[0][0], coor[0][1] + thickness * coor[2])]
-            triangle = pymunk.Poly(self.space.static_body, tri)
-            triangle.elasticity = 0.8
-            triangle.friction = 0.5
-            self.space.add(triangle)
-
-    def _add_wall(self, a, b, radius):
-        wall = pymunk.Segment(self.space.static_body, a, b, radius)
-        wall.elasticity = 0.8
-        wall.friction = 0.5
-        self.space.add(wall)
+        create_table(self.space, self.width(), self.height())
 
     def _create_balls(self):
-        self.cue_ball = self._create_single_ball((self.width() // 4, self.height() // 2), 0)
-
-        start_x = self.width() * 0.75
-        start_y = self.height() / 2
-        rows = 5
-        offset_x = self.ball_radius * 1.75
-        offset_y = self.ball_radius * 2.05
-
-        available_numbers = [1, 2, 3, 4, 5, 6, 7, 9, 10, 11, 12, 13, 14, 15]
-        random.shuffle(available_numbers)
-
-        for col in range(rows):
-            x = start_x + (col * offset_x)
-            start_col_y = start_y - (col * offset_y) / 2
-            for row in range(col + 1):
-                y = start_col_y + (row * offset_y)
-                if col == 2 and row == 1:
-                    ball_number = 8
-                else:
-                    ball_number = available_numbers.pop()
-                self._create_single_ball((x, y), ball_number)
-
-    def _create_single_ball(self, position, number):
-        mass = 3
-        moment = pymunk.moment_for_circle(mass, 0, self.ball_radius)
-        body = pymunk.Body(mass, moment)
-        body.position = position
-        shape = pymunk.Circle(body, self.ball_radius)
-        shape.elasticity = 0.8
-        shape.friction = 1.0
-
-        if number == 0:
-            color_rgb = (255, 255, 255)
-            is_stripe = False
-        elif number == 8:
-            color_rgb = BALL_COLORS[8]
-            is_stripe = False
-        else:
-            is_stripe = number > 8
-            base_index = number if number <= 8 else number - 8
-            color_rgb = BALL_COLORS[base_index]
-
-        shape.color = color_rgb + (255,)
-        shape.number = number
-        shape.is_stripe = is_stripe
-
-        pivot = pymunk.PivotJoint(self.space.static_body, body, (0, 0), (0, 0))
-        pivot.max_bias = 0
-        pivot.max_force = 100
-
-        self.space.add(body, shape, pivot)
-        return shape
+        self.cue_ball = create_balls(self.space, self.width(), self.height(), self.ball_radius)
+        self.cue_ball.filter = pymunk.ShapeFilter(group=CUE_BALL_GROUP)
 
     def _create_cue_stick(self):
         body = pymunk.Body(body_type=pymunk.Body.KINEMATIC)
@@ -195,11 +122,18 @@ class PymunkWidget(QWidget):
         self.cue_stick = shape
 
     def update_simulation(self):
-        steps = 2
-        dt = 1 / 60.0
+        now = time.perf_counter()
+        # Limité pour qu'un gel de la boucle d'événements ne fasse pas sauter la charge à 100 %
+        frame_dt = min(now - self.last_frame_time, 0.1)
+        self.last_frame_time = now
+
+        self._process_pending_input()
+        self.frame_advanced.emit(frame_dt)
+
         if not self.is_aiming:
-            for _ in range(steps):
-                self.space.step(dt / steps)
+            for _ in range(SUBSTEPS):
+                self.space.step(FRAME_DT / SUBSTEPS)
+            self.table_version += 1
 
             if self._all_balls_stopped():
                 self.is_aiming = True
@@ -208,13 +142,46 @@ class PymunkWidget(QWidget):
 
         self.update()
 
+    def _process_pending_input(self):
+        # Applique la dernière position de souris reçue depuis la frame précédente
+        if self.pending_input_time is not None and self.applied_input_time is None:
+            self.applied_input_time = self.pending_input_time
+        self.pending_input_time = None
+
+        if self.pending_pointer is None:
+            return
+        pymunk_x, pymunk_y = self.pending_pointer
+        self.pending_pointer = None
+
+        if self.is_aiming and not self.cue_locked and self.cue_ball:
+            dx = pymunk_x - self.cue_ball.body.position.x
+            dy = pymunk_y - self.cue_ball.body.position.y
+            self.cue_angle = math.atan2(dy, dx)
+
+        # On n'émet que si quelqu'un écoute vraiment le signal
+        if self.receivers(self.mouse_moved) > 0:
+            self.mouse_moved.emit(int(pymunk_x), int(pymunk_y))
+
+    def _mark_input(self):
+        if self.pending_input_time is None:
+            self.pending_input_time = time.perf_counter()
+
+    def input_latency_stats(self) -> Tuple[float, float, float]:
+        """Retourne (moyenne, p95, max) de la latence entrée -> image en millisecondes."""
+        if not self.input_latencies:
+            return 0.0, 0.0, 0.0
+        samples = sorted(self.input_latencies)
+        mean = sum(samples) / len(samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return mean * 1000, p95 * 1000, samples[-1] * 1000
+
     def _stop_rotation(self):
         for body in self.space.bodies:
             if body.body_type == pymunk.Body.DYNAMIC:
                 body.angular_velocity = 0
                 body.velocity = (0, 0)
 
-    def _all_balls_stopped(self, threshold: float = 5.0) -> bool:
+    def _all_balls_stopped(self, threshold: float = STOP_THRESHOLD) -> bool:
         for body in self.space.bodies:
             if body.body_type == pymunk.Body.DYNAMIC:
                 if body.velocity.length > threshold:
@@ -235,6 +202,7 @@ class PymunkWidget(QWidget):
         )
         self.is_aiming = False
         self.cue_locked = False
+        self.table_version += 1
 
     def reset(self):
         for body in list(self.space.bodies):
@@ -250,6 +218,7 @@ class PymunkWidget(QWidget):
         self.is_aiming = True
         self.cue_locked = False
         self.history.clear()
+        self.table_version += 1
 
     def _save_state(self):
         state = []
@@ -274,6 +243,9 @@ class PymunkWidget(QWidget):
                 shape.body.velocity = b.velocity
                 shape.body.angular_velocity = b.angular_velocity
                 shape.body.activate()
+                # Sans pas de simulation pendant la visée, l'index spatial doit être mis à jour à la main
+                self.space.reindex_shapes_for_body(shape.body)
+        self.table_version += 1
 
     def paintEvent(self, event):
         painter = QPainter(self)
@@ -290,6 +262,13 @@ class PymunkWidget(QWidget):
             self._draw_aim_line(painter)
             self._draw_cue_stick(painter)
 
+        painter.end()
+
+        # Latence entre la première entrée de la frame et l'image dessinée
+        if self.applied_input_time is not None:
+            self.input_latencies.append(time.perf_counter() - self.applied_input_time)
+            self.applied_input_time = None
+
     def _draw_walls(self, painter):
         wall_color = QColor(75, 37, 14)
         painter.setBrush(Qt.BrushStyle.NoBrush)
@@ -384,18 +363,95 @@ class PymunkWidget(QWidget):
         painter.drawLine(int(start_qt[0]), int(start_qt[1]), int(end_qt[0]), int(end_qt[1]))
 
     def _draw_aim_line(self, painter):
-        ball_pos = self.cue_ball.body.position
-        ball_qt = self._pymunk_to_qt(ball_pos.x, ball_pos.y)
-
-        end_x = ball_pos.x + 200 * math.cos(self.cue_angle)
-        end_y = ball_pos.y + 200 * math.sin(self.cue_angle)
-        end_qt = self._pymunk_to_qt(end_x, end_y)
+        prediction = self.get_aim_prediction()
 
         color = QColor(255, 0, 0, 200) if self.cue_locked else QColor(255, 255, 255, 150)
         pen = QPen(color, 2)
         pen.setStyle(Qt.PenStyle.DashLine)
         painter.setPen(pen)
-        painter.drawLine(int(ball_qt[0]), int(ball_qt[1]), int(end_qt[0]), int(end_qt[1]))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+
+        points = [QPointF(*self._pymunk_to_qt(x, y)) for x, y in prediction.path]
+        if len(points) > 1:
+            painter.drawPolyline(points)
+
+        if prediction.ghost is not None:
+            ghost_qt = self._pymunk_to_qt(*prediction.ghost)
+            painter.drawEllipse(QPointF(*ghost_qt), self.ball_radius, self.ball_radius)
+
+            # Direction de la balle visée après le contact
+            target_qt = self._pymunk_to_qt(*prediction.target)
+            dx, dy = prediction.deflection
+            end_qt = self._pymunk_to_qt(prediction.target[0] + dx * 100, prediction.target[1] + dy * 100)
+            pen.setStyle(Qt.PenStyle.SolidLine)
+            painter.setPen(pen)
+            painter.drawLine(QPointF(*target_qt), QPointF(*end_qt))
+
+    def get_aim_prediction(self) -> AimPrediction:
+        """Retourne la trajectoire prévue, recalculée seulement si l'angle, la blanche ou la table a changé."""
+        angle_index = round(self.cue_angle / self.aim_angle_step)
+        pos = self.cue_ball.body.position
+        key = (angle_index, round(pos.x, 1), round(pos.y, 1), self.table_version, self.aim_bounce_depth)
+        if key != self._aim_cache_key:
+            self._aim_cache = self._predict_trajectory(angle_index * self.aim_angle_step)
+            self._aim_cache_key = key
+        return self._aim_cache
+
+    def _predict_trajectory(self, angle: float) -> AimPrediction:
+        prediction = AimPrediction()
+        query_filter = pymunk.ShapeFilter(group=CUE_BALL_GROUP)
+        query_radius = self.ball_radius
+
+        position = pymunk.Vec2d(*self.cue_ball.body.position)
+        direction = pymunk.Vec2d(math.cos(angle), math.sin(angle))
+        prediction.path.append(tuple(position))
+
+        for _ in range(self.aim_bounce_depth + 1):
+            # Le segment s'arrête au bord du widget (sinon la ligne sort par les poches)
+            end = position + direction * self._distance_to_edge(position, direction)
+            info = self.space.segment_query_first(position, end, query_radius, query_filter)
+            if info is None:
+                prediction.path.append(tuple(end))
+                break
+
+            hit = position + (end - position) * info.alpha
+            shape = info.shape
+            if isinstance(shape, pymunk.Circle) and shape.body.body_type == pymunk.Body.DYNAMIC:
+                target = shape.body.position
+                ghost = self._ghost_position(position, direction, target)
+                prediction.path.append(tuple(ghost))
+                prediction.ghost = tuple(ghost)
+                prediction.target = tuple(target)
+                prediction.deflection = tuple((target - ghost).normalized())
+                break
+
+            prediction.path.append(tuple(hit))
+
+            # Rebond sur la bande : réflexion selon la normale de contact
+            normal = info.normal
+            direction = direction - 2 * direction.dot(normal) * normal
+            position = hit + direction
+            # Rayon légèrement réduit pour ne pas toucher la bande d'où l'on repart
+            query_radius = self.ball_radius - 1
+
+        return prediction
+
+    def _ghost_position(self, origin, direction, target):
+        # Premier point du trajet à exactement 2 rayons du centre de la balle visée
+        to_target = target - origin
+        along = direction.dot(to_target)
+        discriminant = along ** 2 - (to_target.dot(to_target) - (2 * self.ball_radius) ** 2)
+        distance = max(0.0, along - math.sqrt(max(0.0, discriminant)))
+        return origin + direction * distance
+
+    def _distance_to_edge(self, position, direction) -> float:
+        distances = []
+        for coord, d, limit in ((position.x, direction.x, self.width()), (position.y, direction.y, self.height())):
+            if d > 0:
+                distances.append((limit - coord) / d)
+            elif d < 0:
+                distances.append(-coord / d)
+        return max(0.0, min(distances)) if distances else 0.0
 
     def _get_cue_position(self) -> Tuple[Tuple[float, float], Tuple[float, float]]:
         ball_pos = self.cue_ball.body.position
@@ -406,34 +462,29 @@ class PymunkWidget(QWidget):
         return (start_x, start_y), (end_x, end_y)
 
     def mouseMoveEvent(self, event):
-        qt_x = event.pos().x()
-        qt_y = event.pos().y()
-        pymunk_x, pymunk_y = self._qt_to_pymunk(qt_x, qt_y)
-
-        if self.is_aiming and not self.cue_locked and self.cue_ball:
-            dx = pymunk_x - self.cue_ball.body.position.x
-            dy = pymunk_y - self.cue_ball.body.position.y
-            self.cue_angle = math.atan2(dy, dx)
-            self.update()
-
-        self.mouse_moved.emit(int(pymunk_x), int(pymunk_y))
-        if self.mouse_pressed_flag:
-            self.mouse_pressed.emit()
+        # Le calcul de l'angle est reporté à la prochaine frame (update_simulation)
+        self.pending_pointer = self._qt_to_pymunk(event.position().x(), event.position().y())
+        self._mark_input()
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
             self.mouse_pressed_flag = True
-            self.mouse_pressed.emit()
+            if self.receivers(self.mouse_pressed) > 0:
+                self.mouse_pressed.emit()
         elif event.button() == Qt.MouseButton.RightButton:
             if self.is_aiming:
+                # Applique d'abord le mouvement en attente pour ne pas le perdre au verrouillage
+                self._process_pending_input()
                 self.cue_locked = not self.cue_locked
-                self.update()
-            self.lock_toggled.emit()
+                self._mark_input()
+            if self.receivers(self.lock_toggled) > 0:
+                self.lock_toggled.emit()
 
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
             self.mouse_pressed_flag = False
-            self.mouse_released.emit()
+            if self.receivers(self.mouse_released) > 0:
+                self.mouse_released.emit()
 
 
 class MainWindow(QMainWindow):
@@ -480,9 +531,15 @@ class MainWindow(QMainWindow):
         self.pushButton.released.connect(self.on_shoot_released)
 
         self.progressBar.setValue(0)
-        self.power_timer = QTimer()
-        self.power_timer.timeout.connect(self.increase_power)
-        self.power_accumulation = 0
+        # La charge de puissance suit le temps des frames du widget au lieu d'un QTimer séparé
+        self.power_charging = False
+        self.power_rate = 80.0  # pourcentage par seconde
+        self.power_accumulation = 0.0
+        self.pymunk_widget.frame_advanced.connect(self.increase_power)
+
+        # Affichage périodique de la latence entrée -> image dans la barre d'état
+        self.latency_display_elapsed = 0.0
+        self.pymunk_widget.frame_advanced.connect(self.update_latency_display)
 
         self.actionAfficher_graphiques.toggled.connect(self.dock_widget_visibility)
         self.dockWidget.visibilityChanged.connect(self.uncheck_action)
@@ -497,20 +554,31 @@ class MainWindow(QMainWindow):
         self.__controller = controller
 
     def on_shoot_pressed(self):
-        self.power_accumulation = 0
-        self.power_timer.start(50)
+        self.power_accumulation = 0.0
+        self.power_charging = True
 
     def on_shoot_released(self):
-        self.power_timer.stop()
+        self.power_charging = False
         # Vérification de sécurité
         if self.__controller:
             self.__controller.shoot()
-        self.power_accumulation = 0
+        self.power_accumulation = 0.0
         self.progressBar.setValue(0)
 
-    def increase_power(self):
-        self.power_accumulation = min(100, self.power_accumulation + 4)
-        self.progressBar.setValue(self.power_accumulation)
+    def increase_power(self, dt: float):
+        if not self.power_charging:
+            return
+        self.power_accumulation = min(100.0, self.power_accumulation + self.power_rate * dt)
+        self.progressBar.setValue(int(self.power_accumulation))
+
+    def update_latency_display(self, dt: float):
+        self.latency_display_elapsed += dt
+        if self.latency_display_elapsed < 1.0:
+            return
+        self.latency_display_elapsed = 0.0
+        mean, p95, worst = self.pymunk_widget.input_latency_stats()
+        self.statusBar().showMessage(
+            f"Latence visée : moy {mean:.1f} ms | p95 {p95:.1f} ms | max {worst:.1f} ms")
 
     def dock_widget_visibility(self):
         self.dockWidget.setVisible(self.actionAfficher_graphiques.isChecked())